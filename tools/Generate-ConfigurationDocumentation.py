@@ -8,12 +8,17 @@ to produce a markdown document describing the payloads and their key settings.
 Output: INTUNE-MY-MACS-DOCUMENTATION.md at repo root.
 
 Heuristics:
+ - JSON documents are routed to exactly one extractor via EXTRACTORS, keyed by file kind and the
+   document type (top-level '@odata.type', '@odata.context' entity set, or DDM declaration 'Type').
+   Add new types with @register_extractor.
  - JSON Intune Settings Catalog: look for top-level keys like 'name', 'description', 'platforms', 'settings'.
  - 'settings' is an array of settingInstance containers. We traverse nested 'children' arrays.
  - Extract settingDefinitionId and any simple/choice values (value, string/integer) summarizing them.
  - Mobileconfig: parse plist, enumerate PayloadContent entries. For each payload dict list key/value excluding payload metadata keys.
  - Large payloads (> 60 entries) are truncated with summary note.
  - Provide both aggregated table and per-policy section with bullet list.
+ - --include/--exclude filters are resolved against paths and manifests (index_artifacts) before any
+   payload is opened; iter_entries() streams the matching entries lazily for library callers.
 
 """
 
@@ -21,14 +26,34 @@ from __future__ import annotations
 import json
 import plistlib
 import pathlib
+import random
 import re
+import string
 import argparse
+import base64
+import bisect
+import codecs
+import collections
+import fnmatch
+import functools
+import itertools
+import math
+import operator
+import hashlib
+import threading
+import time
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import orjson  # optional accelerated JSON backend (pip install orjson)
+except ImportError:
+    orjson = None
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
-OUTPUT_FILE = REPO_ROOT / "INTUNE-MY-MACS-DOCUMENTATION.md"
-DOCX_OUTPUT_FILE = REPO_ROOT / "INTUNE-MY-MACS-DOCUMENTATION.docx"
+OUTPUT_NAME = "INTUNE-MY-MACS-DOCUMENTATION.md"
+DOCX_OUTPUT_NAME = "INTUNE-MY-MACS-DOCUMENTATION.docx"
 
 JSON_GLOB = [
     "configurations/intune/*.json",
@@ -44,35 +69,200 @@ MOBILECONFIG_GLOB = [
 
 METADATA_KEYS = {"PayloadDisplayName", "PayloadIdentifier", "PayloadType", "PayloadUUID", "PayloadVersion"}
 
-def gather_files(patterns: List[str], suffix: str = "") -> List[pathlib.Path]:
+# Bump when extractor output changes so persisted caches are not reused; the stored version
+# also carries registry_fingerprint(), so registering an extractor invalidates old results
+CACHE_VERSION = 4
+
+class ExtractionCache:
+    """Content-addressed cache of per-file extraction results.
+
+    Keyed by (kind, sha1 of the file bytes), so a baseline checked into several tenant
+    repositories is parsed and extracted once per process. Thread-safe; optionally
+    loaded from / saved to a JSON file so results survive between runs. Only entries
+    used by the current run are saved, so stale content does not accumulate in the file.
+    Register plugin extractors before creating the cache: the persisted file is only
+    reused while the extractor registry is unchanged.
+    """
+
+    def __init__(self, path: pathlib.Path | None = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[str, Any] = {}
+        self._used: set = set()
+        self._lock = threading.Lock()
+        self.version = f"{CACHE_VERSION}:{registry_fingerprint()}"
+        if path and path.exists():
+            try:
+                stored = json.loads(path.read_text(encoding="utf-8"))
+                if stored.get("version") == self.version:
+                    self._data = stored.get("entries", {})
+            except Exception as e:
+                print(f"[WARN] Ignoring unreadable extraction cache {path}: {e}")
+
+    def get_or_compute(self, kind: str, raw: bytes, compute: Callable[[bytes], Any]) -> Any:
+        """Return the cached result for raw, computing (and storing) it on a miss.
+        None results are not cached so parse warnings are repeated for every broken file.
+        """
+        key = f"{kind}:{hashlib.sha1(raw).hexdigest()}"
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._used.add(key)
+                return self._data[key]
+            self.misses += 1
+        value = compute(raw)
+        if value is not None:
+            with self._lock:
+                self._data[key] = value
+                self._used.add(key)
+        return value
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            payload = {"version": self.version, "entries": {key: self._data[key] for key in self._used}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(payload), encoding="utf-8")
+
+def gather_files(patterns: List[str], suffix: str = "", repo_root: pathlib.Path = REPO_ROOT) -> List[pathlib.Path]:
     files: List[pathlib.Path] = []
     for pattern in patterns:
-        for p in REPO_ROOT.glob(pattern):
+        for p in repo_root.glob(pattern):
             if p.is_file():
                 if suffix and not p.name.endswith(suffix):
                     continue
                 files.append(p)
-    return sorted(files)
+    return sorted(set(files))
+
+# "auto" uses orjson when installed, "stdlib" forces the json module
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+JSON_BACKEND = "auto"
+# orjson turns integers outside the 64-bit range into floats; such documents (any run of
+# 19+ digits, including inside strings) go to the stdlib so ints stay exact. Mapping digits
+# to '0' and everything else to ' ' lets a C-level substring search find the runs. The scan
+# works on fixed-size chunks (overlapping by 18 bytes so no run is split), so no full-size
+# copy of the document is made.
+DIGIT_RUN_TABLE = bytes(48 if 48 <= i <= 57 else 32 for i in range(256))
+WIDE_INT_RUN = b"0" * 19
+WIDE_INT_SCAN_CHUNK = 1 << 16
+
+def has_wide_int_run(view: memoryview) -> bool:
+    overlap = len(WIDE_INT_RUN) - 1
+    for start in range(0, len(view), WIDE_INT_SCAN_CHUNK):
+        if WIDE_INT_RUN in bytes(view[start:start + WIDE_INT_SCAN_CHUNK + overlap]).translate(DIGIT_RUN_TABLE):
+            return True
+    return False
+
+def parse_json_bytes(raw: bytes | memoryview, backend: str | None = None) -> Any:
+    """Parse JSON bytes tolerating UTF-8 BOM, raising on invalid input.
 
-def safe_read_json(path: pathlib.Path) -> Dict[str, Any] | None:
-    """Read JSON tolerating UTF-8 BOM."""
+    The orjson backend parses the raw buffer directly; a BOM is dropped by slicing a
+    memoryview, so no decoded copy of the document is made. Anything orjson rejects
+    (including inputs the stdlib accepts, such as NaN) or would change (integers wider
+    than 64 bits) is handled by the stdlib so results and error messages match the stdlib
+    backend exactly.
+    """
+    backend = backend or JSON_BACKEND
+    if backend != "stdlib" and orjson is not None:
+        view = memoryview(raw)
+        if view[:3] == codecs.BOM_UTF8:
+            view = view[3:]
+        if not has_wide_int_run(view):
+            try:
+                return orjson.loads(view)
+            except orjson.JSONDecodeError:
+                pass
+    elif backend == "orjson":
+        raise RuntimeError("orjson backend requested but orjson is not installed")
+    text = bytes(raw).decode("utf-8-sig")  # utf-8-sig strips BOM if present
+    return json.loads(text)
+
+def decode_json(raw: bytes, path: pathlib.Path) -> Dict[str, Any] | None:
+    """Parse JSON bytes tolerating UTF-8 BOM; path is only used for the warning."""
     try:
-        # Read raw then decode handling BOM if present
-        raw = path.read_bytes()
-        text = raw.decode("utf-8-sig")  # utf-8-sig strips BOM if present
-        return json.loads(text)
+        return parse_json_bytes(raw)
     except Exception as e:
         print(f"[WARN] Failed to parse JSON {path}: {e}")
         return None
 
-def safe_read_plist(path: pathlib.Path) -> Dict[str, Any] | None:
+def decode_plist(raw: bytes, path: pathlib.Path) -> Dict[str, Any] | None:
     try:
-        with path.open("rb") as f:
-            return plistlib.load(f)
+        return plistlib.loads(raw)
     except Exception as e:
         print(f"[WARN] Failed to parse mobileconfig plist {path}: {e}")
         return None
 
+# Extractor registry: (file kind, document type) -> extractor. Each document is routed to
+# exactly one extractor; the empty type is the per-kind fallback.
+Extractor = Callable[[Dict[str, Any]], List[Tuple[str, str]]]
+EXTRACTORS: Dict[Tuple[str, str], Extractor] = {}
+GRAPH_TYPE_PREFIX = "#microsoft.graph."
+# Graph entity sets whose exports carry @odata.context but no top-level @odata.type
+CONTEXT_TYPES = {
+    "configurationPolicies": "deviceManagementConfigurationPolicy",
+}
+DDM_DECLARATION = "appleDeclaration"
+# Type-name substrings routed to a registered family extractor when no exact type matches
+EXTRACTOR_FAMILIES = {
+    "CompliancePolicy": "deviceCompliancePolicy",
+}
+
+def register_extractor(kind: str, *type_names: str) -> Callable[[Extractor], Extractor]:
+    """Decorator registering an extractor for a file kind and one or more document types.
+    Type names may be given with or without the '#microsoft.graph.' prefix; register with
+    no type names to make the extractor the fallback for that kind.
+    """
+    def decorator(fn: Extractor) -> Extractor:
+        for type_name in type_names or ("",):
+            EXTRACTORS[(kind, normalize_type(type_name))] = fn
+        return fn
+    return decorator
+
+def registry_fingerprint() -> str:
+    """Hash of how documents are routed (registered types, extractor names, families), so
+    persisted extraction results are not reused under a different registry.
+    """
+    routes = sorted(f"{kind}|{type_name}|{fn.__qualname__}" for (kind, type_name), fn in EXTRACTORS.items())
+    routes += sorted(f"family|{marker}|{family}" for marker, family in EXTRACTOR_FAMILIES.items())
+    routes += sorted(f"context|{entity_set}|{type_name}" for entity_set, type_name in CONTEXT_TYPES.items())
+    return hashlib.sha1("\n".join(routes).encode("utf-8")).hexdigest()[:12]
+
+def normalize_type(type_name: str) -> str:
+    if type_name.startswith(GRAPH_TYPE_PREFIX):
+        return type_name[len(GRAPH_TYPE_PREFIX):]
+    return type_name
+
+def resolve_extractor(kind: str, type_name: str) -> Extractor | None:
+    type_name = normalize_type(type_name)
+    extractor = EXTRACTORS.get((kind, type_name))
+    if extractor is None:
+        for marker, family in EXTRACTOR_FAMILIES.items():
+            if marker in type_name:
+                extractor = EXTRACTORS.get((kind, family))
+                break
+    return extractor or EXTRACTORS.get((kind, ""))
+
+def document_type(fields: Dict[str, Any]) -> str:
+    """Derive the registry type from a document's top-level fields:
+    @odata.type, then the @odata.context entity set, then a DDM declaration 'Type'.
+    """
+    odata_type = fields.get("@odata.type")
+    if isinstance(odata_type, str) and odata_type:
+        return normalize_type(odata_type)
+    context = fields.get("@odata.context")
+    if isinstance(context, str):
+        for entity_set, type_name in CONTEXT_TYPES.items():
+            if f"/{entity_set}/" in context or context.endswith(f"/{entity_set}"):
+                return type_name
+    declaration_type = fields.get("Type")
+    if isinstance(declaration_type, str) and declaration_type.startswith("com.apple."):
+        return DDM_DECLARATION
+    return ""
+
+@register_extractor("json")
+@register_extractor("json", "deviceManagementConfigurationPolicy")
 def extract_settings_catalog(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
     """Return list of (settingDefinitionId, value) pairs by deep traversal.
     Handles nested settingInstance and groupSettingCollectionValue/children structures.
@@ -168,6 +358,7 @@ def simplify_display_value(key: str, raw_val: Any) -> str:
             return remainder
     return val
 
+@register_extractor("mobileconfig")
 def extract_mobileconfig(plist_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
     out: List[Tuple[str, str]] = []
     payloads = plist_doc.get("PayloadContent", [])
@@ -186,6 +377,18 @@ def extract_mobileconfig(plist_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
                 out.append((f"{prefix}.{k}", f"complex:{type(v).__name__}"))
     return out
 
+@register_extractor(
+    "json",
+    "deviceCompliancePolicy",
+    "macOSCompliancePolicy",
+    "iosCompliancePolicy",
+    "androidCompliancePolicy",
+    "androidWorkProfileCompliancePolicy",
+    "androidDeviceOwnerCompliancePolicy",
+    "aospDeviceOwnerCompliancePolicy",
+    "windows10CompliancePolicy",
+    "windows81CompliancePolicy",
+)
 def extract_compliance_policy(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
     """Extract settings from compliance policy JSON (flat structure).
     Ignores metadata fields and extracts policy configuration.
@@ -217,13 +420,299 @@ def extract_compliance_policy(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]
     
     return out
 
-def format_table(rows: List[Tuple[str, str]]) -> str:
-    """Return a markdown table with all rows (no truncation)."""
-    if not rows:
-        return "_No payload settings discovered_\n"
-    header = "| Key | Value |\n|-----|-------|\n"
-    body = "".join(f"| `{k}` | `{v}` |\n" for k, v in rows)
-    return header + body
+@register_extractor("json", "deviceEnrollmentPlatformRestriction")
+def extract_enrollment_restriction(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Extract platformRestriction fields from an enrollment restriction JSON."""
+    out: List[Tuple[str, str]] = []
+    pr = json_doc.get("platformRestriction", {})
+    if isinstance(pr, dict):
+        for k, v in pr.items():
+            out.append((f"platformRestriction.{k}", simplify_value(v)))
+    return out
+
+@register_extractor(
+    "json",
+    "macOSGeneralDeviceConfiguration",
+    "macOSDeviceFeaturesConfiguration",
+    "macOSEndpointProtectionConfiguration",
+    "macOSExtensionsConfiguration",
+    "macOSSoftwareUpdateConfiguration",
+)
+def extract_device_configuration(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Extract settings from a (non-custom) deviceConfigurations JSON (flat structure).
+    Unset (null) properties are skipped; Graph exports list every property of the type.
+    """
+    out: List[Tuple[str, str]] = []
+    IGNORE_KEYS = {
+        "@odata.type", "@odata.context", "displayName", "description", "id", "createdDateTime",
+        "lastModifiedDateTime", "version", "roleScopeTagIds", "supportsScopeTags",
+        "deviceManagementApplicabilityRuleOsEdition", "deviceManagementApplicabilityRuleOsVersion",
+        "deviceManagementApplicabilityRuleDeviceMode",
+    }
+    for key, value in json_doc.items():
+        if key in IGNORE_KEYS or value is None:
+            continue
+        out.append((key, simplify_value(value)))
+    return out
+
+@register_extractor("json", "macOSCustomConfiguration")
+def extract_custom_configuration(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Extract settings from a deviceConfigurations custom profile by decoding its
+    base64 mobileconfig payload.
+    """
+    try:
+        plist_doc = plistlib.loads(base64.b64decode(json_doc.get("payload") or ""))
+    except Exception as e:
+        print(f"[WARN] Failed to decode custom configuration payload '{json_doc.get('displayName')}': {e}")
+        return []
+    if not isinstance(plist_doc, dict):
+        return []
+    return extract_mobileconfig(plist_doc)
+
+@register_extractor("json", DDM_DECLARATION)
+def extract_ddm_declaration(json_doc: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Extract settings from an Apple DDM declaration (Type/Identifier/Payload JSON)."""
+    out: List[Tuple[str, str]] = []
+    prefix = json_doc.get("Type", "declaration")
+    payload = json_doc.get("Payload", {})
+    if isinstance(payload, dict):
+        for k, v in payload.items():
+            out.append((f"{prefix}.{k}", simplify_value(v)))
+    return out
+
+PAGE_BREAK = "```{=openxml}\n<w:p><w:r><w:br w:type=\"page\"/></w:r></w:p>\n```\n\n"
+
+# Built-in output templates. Override any of them by placing <name>.md in a --templates
+# directory; placeholders use string.Template syntax ($name / ${name}, $$ for a literal $).
+DEFAULT_TEMPLATES: Dict[str, str] = {
+    "document": (
+        # Page 1: Cover Page (Large, Bold)
+        "# Intune My Macs\n\n"
+        "## Configuration Documentation\n\n"
+        "**Generated:** $generated\n\n"
+        "**Total Artifacts:** $total\n\n"
+        "$page_break"
+        # Page 2: Project Description (Standard font)
+        "# About Intune My Macs\n\n"
+        "**Intune My Macs** is a production-ready configuration repository for Microsoft Intune-based macOS device management. "
+        "This project provides enterprise-grade policies, configuration profiles, scripts, and packages to secure, "
+        "configure, and manage macOS devices in enterprise environments.\n\n"
+        "## What's Included\n\n"
+        "This repository contains the following artifact types:\n\n"
+        "- **Settings Catalog Policies** - Modern declarative configuration policies\n"
+        "- **Custom Configuration Profiles** - Traditional mobileconfig profiles\n"
+        "- **Compliance Policies** - Device compliance requirements\n"
+        "- **Shell Scripts** - Automated configuration and remediation scripts\n"
+        "- **Application Packages** - macOS application installers\n"
+        "- **Custom Attributes** - Device inventory attributes\n\n"
+        "## About This Documentation\n\n"
+        "This document catalogs all configuration artifacts with complete settings details. "
+        "Use the Index to quickly locate specific configurations, then refer to the detailed sections for complete settings breakdowns.\n\n"
+        "$page_break"
+        # Page 3: Index with Summary Table
+        "# Index\n\n"
+        "Click any reference ID to jump to detailed configuration.\n\n"
+        "| Ref | Type | Settings Count |\n|-----|------|----------------|\n"
+        "$index_rows"
+        "\n$page_break"
+        "# Detailed Configuration\n\n"
+        "$artifacts"
+    ),
+    "index_row": "| [$ref](#$anchor) | $type | $count |\n",
+    "artifact": (
+        "### $ref ($type)\n\n"
+        "$description"
+        "**Source:** `$relpath`  \n"
+        "**Settings:** $count\n\n"
+        "$settings"
+        "\n\n"
+    ),
+    "settings_table": "| Key | Value |\n|-----|-------|\n$rows",
+    "setting_row": "| `$key` | `$value` |\n",
+}
+# Placeholders each template may use; anything else is rejected when compiling
+TEMPLATE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "document": ("generated", "total", "page_break", "index_rows", "artifacts"),
+    "index_row": ("ref", "anchor", "type", "count", "name", "relpath"),
+    "artifact": ("ref", "anchor", "type", "count", "name", "relpath", "description", "settings"),
+    "settings_table": ("rows",),
+    "setting_row": ("key", "value"),
+}
+
+class CompiledTemplate:
+    """A $placeholder template compiled to its literal parts and field names.
+
+    That plain data is what the ExtractionCache stores between runs. Single renders use a
+    %-format string built from the parts. Row renders never evaluate template text: rows
+    whose fields share one separator become a str.join per row, anything else interleaves
+    the literal parts with value columns in a single flat list.
+    """
+
+    __slots__ = ("parts", "fields", "fmt", "_row_renderers")
+
+    def __init__(self, parts: List[str], fields: List[str]):
+        self.parts = tuple(parts)
+        self.fields = tuple(fields)
+        self.fmt = "%s".join(part.replace("%", "%%") for part in self.parts)
+        self._row_renderers: Dict[Tuple[str, ...], Callable[[List[Tuple[str, ...]]], str]] = {}
+
+    def render(self, values: Dict[str, Any]) -> str:
+        return self.fmt % tuple([values[name] for name in self.fields])
+
+    def row_renderer(self, columns: Tuple[str, ...]) -> Callable[[List[Tuple[str, ...]]], str]:
+        """Function rendering one line per row tuple, built once per column layout."""
+        renderer = self._row_renderers.get(columns)
+        if renderer is None:
+            renderer = self._row_renderers[columns] = self._build_row_renderer(tuple(columns))
+        return renderer
+
+    def _build_row_renderer(self, columns: Tuple[str, ...]) -> Callable[[List[Tuple[str, ...]]], str]:
+        parts, fmt = self.parts, self.fmt
+        if not self.fields:
+            return lambda rows: parts[0] * len(rows)
+        if self.fields == columns and len(set(parts[1:-1])) <= 1:
+            # Every field separated by the same literal: each row is one C-level str.join
+            prefix, suffix = parts[0], parts[-1]
+            separator = parts[1] if len(parts) > 2 else ""
+            glue = suffix + prefix
+
+            def render(rows: List[Tuple[str, ...]]) -> str:
+                if len(rows) == 1:
+                    return fmt % rows[0]
+                try:
+                    return prefix + glue.join(map(separator.join, rows)) + suffix if rows else ""
+                except TypeError:
+                    # A non-str value (e.g. a numeric settingDefinitionId); %s formats anything
+                    return "".join([fmt % row for row in rows])
+
+            return render
+        getters = [operator.itemgetter(columns.index(field)) for field in self.fields]
+
+        def render(rows: List[Tuple[str, ...]]) -> str:
+            try:
+                return self._interleave([map(getter, rows) for getter in getters], len(rows))
+            except TypeError:
+                return "".join([fmt % tuple([getter(row) for getter in getters]) for row in rows])
+
+        return render
+
+    def render_columns(self, columns: Dict[str, List[Any]], count: int) -> str:
+        """Render count lines from one value list per field: line i uses columns[field][i]."""
+        if not self.fields:
+            return self.parts[0] * count
+        values = [columns[field] for field in self.fields]
+        try:
+            return self._interleave(values, count)
+        except TypeError:
+            fmt = self.fmt
+            return "".join([fmt % row for row in zip(*values)])
+
+    def _interleave(self, values: List[Iterable[str]], count: int) -> str:
+        # Literal parts and value columns written into one flat list with strided slice
+        # assignment (no per-line tuples); str.join raises TypeError on non-str values
+        pieces: List[Iterable[str]] = []
+        for literal, column in zip(self.parts, values):
+            if literal:
+                pieces.append([literal] * count)
+            pieces.append(column)
+        if self.parts[-1]:
+            pieces.append([self.parts[-1]] * count)
+        stride = len(pieces)
+        out = [""] * (stride * count)
+        for offset, piece in enumerate(pieces):
+            out[offset::stride] = piece
+        return "".join(out)
+
+def compile_template(name: str, source: str) -> List[Any]:
+    """Split string.Template syntax into [literal parts, field names]; raise ValueError
+    on malformed or unknown placeholders.
+    """
+    allowed = TEMPLATE_FIELDS[name]
+    parts: List[str] = []
+    fields: List[str] = []
+    literal = ""
+    last = 0
+    for m in string.Template.pattern.finditer(source):
+        literal += source[last:m.start()]
+        last = m.end()
+        if m.group("escaped") is not None:
+            literal += "$"
+            continue
+        field = m.group("named") or m.group("braced")
+        if field is None:
+            line = source.count("\n", 0, m.start()) + 1
+            raise ValueError(f"invalid placeholder on line {line}")
+        if field not in allowed:
+            raise ValueError(f"unknown placeholder ${field} (allowed: {', '.join(allowed)})")
+        parts.append(literal)
+        fields.append(field)
+        literal = ""
+    parts.append(literal + source[last:])
+    return [parts, fields]
+
+def load_templates(
+    template_dir: pathlib.Path | None = None,
+    cache: ExtractionCache | None = None,
+) -> Dict[str, CompiledTemplate]:
+    """Compile the output templates once for a run, preferring <name>.md files in
+    template_dir. Compiled forms are cached by source content alongside extraction results.
+    """
+    if template_dir is None and cache is None:
+        return default_templates()
+    templates: Dict[str, CompiledTemplate] = {}
+    for name, default_source in DEFAULT_TEMPLATES.items():
+        template_path = template_dir / f"{name}.md" if template_dir else None
+        def compile_source(raw: bytes, name: str = name) -> List[Any]:
+            return compile_template(name, raw.decode("utf-8"))
+        try:
+            raw = default_source.encode("utf-8")
+            if template_path and template_path.exists():
+                raw = template_path.read_bytes()
+            if cache is None:
+                compiled = compile_source(raw)
+            else:
+                compiled = cache.get_or_compute(f"template:{name}", raw, compile_source)
+                if not valid_compiled_template(name, compiled):
+                    # Cache files are shared data; never trust their shape
+                    compiled = compile_source(raw)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"[WARN] Invalid template {template_path}: {e}; using built-in '{name}' template")
+            compiled = compile_template(name, default_source)
+        templates[name] = CompiledTemplate(*compiled)
+    return templates
+
+def valid_compiled_template(name: str, compiled: Any) -> bool:
+    """Check a cached [parts, fields] pair has the shape compile_template() produces."""
+    if not (isinstance(compiled, list) and len(compiled) == 2):
+        return False
+    parts, fields = compiled
+    return (
+        isinstance(parts, list)
+        and isinstance(fields, list)
+        and len(parts) == len(fields) + 1
+        and all(isinstance(p, str) for p in parts)
+        and all(f in TEMPLATE_FIELDS[name] for f in fields)
+    )
+
+@functools.lru_cache(maxsize=None)
+def default_templates() -> Dict[str, CompiledTemplate]:
+    """The built-in templates, compiled once per process."""
+    return {name: CompiledTemplate(*compile_template(name, source)) for name, source in DEFAULT_TEMPLATES.items()}
+
+def dump_templates(template_dir: pathlib.Path) -> None:
+    """Write the built-in templates to template_dir as a starting point for customization."""
+    template_dir.mkdir(parents=True, exist_ok=True)
+    for name, source in DEFAULT_TEMPLATES.items():
+        (template_dir / f"{name}.md").write_text(source, encoding="utf-8")
+    print(f"[INFO] Wrote {len(DEFAULT_TEMPLATES)} templates to {template_dir}")
+
+NO_SETTINGS = "_No payload settings discovered_\n"
+SETTING_COLUMNS = ("key", "value")
+
+def anchor_for(ref: str, type_: str) -> str:
+    # Mirror the heading line: ### ref (Type) -> pandoc/github anchor generation heuristic
+    anchor_base = f"{ref}-{type_.lower()}"
+    return anchor_base.replace(' ', '-').lower()
 
 def classify_type(path: pathlib.Path) -> str:
     name = path.name
@@ -245,59 +734,41 @@ def classify_type(path: pathlib.Path) -> str:
         return "CustomConfig"
     return "Policy"
 
-def generate_markdown(entries: List[Dict[str, Any]]) -> str:
-    md: List[str] = []
+def artifact_column(entries: List[Dict[str, Any]], field: str, templates: Dict[str, CompiledTemplate]) -> List[str]:
+    """The rendered value of an index_row/artifact template field for every entry."""
+    if field == "anchor":
+        return [anchor_for(e['ref'], e['type']) for e in entries]
+    if field == "count":
+        return list(map(str, map(operator.itemgetter('count'), entries)))
+    if field == "name":
+        return [e.get('name') or "" for e in entries]
+    if field == "description":
+        return [f"{e['description']}\n\n" if e.get("description") else "" for e in entries]
+    if field == "settings":
+        render_setting_rows = templates["setting_row"].row_renderer(SETTING_COLUMNS)
+        # settings_table only has the $rows field, so every placeholder takes the rendered rows
+        table_fmt = templates["settings_table"].fmt
+        table_arity = len(templates["settings_table"].fields)
+        return [
+            table_fmt % ((render_setting_rows(e['settings']),) * table_arity) if e['settings'] else NO_SETTINGS
+            for e in entries
+        ]
+    return list(map(operator.itemgetter(field), entries))
+
+def generate_markdown(entries: List[Dict[str, Any]], templates: Dict[str, CompiledTemplate] | None = None) -> str:
     import datetime
     today = datetime.date.today().strftime("%B %d, %Y")
-    
-    # Page 1: Cover Page (Large, Bold)
-    md.append("# Intune My Macs\n\n")
-    md.append("## Configuration Documentation\n\n")
-    md.append(f"**Generated:** {today}\n\n")
-    md.append(f"**Total Artifacts:** {len(entries)}\n\n")
-    md.append("```{=openxml}\n<w:p><w:r><w:br w:type=\"page\"/></w:r></w:p>\n```\n\n")
-    
-    # Page 2: Project Description (Standard font)
-    md.append("# About Intune My Macs\n\n")
-    md.append("**Intune My Macs** is a production-ready configuration repository for Microsoft Intune-based macOS device management. ")
-    md.append("This project provides enterprise-grade policies, configuration profiles, scripts, and packages to secure, ")
-    md.append("configure, and manage macOS devices in enterprise environments.\n\n")
-    md.append("## What's Included\n\n")
-    md.append("This repository contains the following artifact types:\n\n")
-    md.append("- **Settings Catalog Policies** - Modern declarative configuration policies\n")
-    md.append("- **Custom Configuration Profiles** - Traditional mobileconfig profiles\n")
-    md.append("- **Compliance Policies** - Device compliance requirements\n")
-    md.append("- **Shell Scripts** - Automated configuration and remediation scripts\n")
-    md.append("- **Application Packages** - macOS application installers\n")
-    md.append("- **Custom Attributes** - Device inventory attributes\n\n")
-    md.append("## About This Documentation\n\n")
-    md.append("This document catalogs all configuration artifacts with complete settings details. ")
-    md.append("Use the Index to quickly locate specific configurations, then refer to the detailed sections for complete settings breakdowns.\n\n")
-    md.append("```{=openxml}\n<w:p><w:r><w:br w:type=\"page\"/></w:r></w:p>\n```\n\n")
-    
-    # Page 3: Index with Summary Table
-    md.append("# Index\n\n")
-    md.append("Click any reference ID to jump to detailed configuration.\n\n")
-    md.append("| Ref | Type | Settings Count |\n|-----|------|----------------|\n")
-    def anchor_for(ref: str, type_: str) -> str:
-        # Mirror the heading line: ### ref (Type) -> pandoc/github anchor generation heuristic
-        anchor_base = f"{ref}-{type_.lower()}"
-        return anchor_base.replace(' ', '-').lower()
-    for e in entries:
-        anchor = anchor_for(e['ref'], e['type'])
-        md.append(f"| [{e['ref']}](#{anchor}) | {e['type']} | {e['count']} |\n")
-    md.append("\n```{=openxml}\n<w:p><w:r><w:br w:type=\"page\"/></w:r></w:p>\n```\n\n")
-    
-    md.append("# Detailed Configuration\n\n")
-    for e in entries:
-        md.append(f"### {e['ref']} ({e['type']})\n\n")
-        if e.get("description"):
-            md.append(f"{e['description']}\n\n")
-        md.append(f"**Source:** `{e['relpath']}`  \n")
-        md.append(f"**Settings:** {e['count']}\n\n")
-        md.append(format_table(e['settings']))
-        md.append("\n\n")
-    return "".join(md)
+    templates = templates or default_templates()
+    index_row, artifact = templates["index_row"], templates["artifact"]
+    # Only the fields the row templates use are computed, each in one pass over the entries
+    columns = {field: artifact_column(entries, field, templates) for field in dict.fromkeys(index_row.fields + artifact.fields)}
+    return templates["document"].render({
+        "generated": today,
+        "total": len(entries),
+        "page_break": PAGE_BREAK,
+        "index_rows": index_row.render_columns(columns, len(entries)),
+        "artifacts": artifact.render_columns(columns, len(entries)),
+    })
 
 def markdown_to_docx(md_text: str, docx_path: pathlib.Path) -> None:
     """Very lightweight markdown to docx conversion focusing on headings, paragraphs, code spans and tables.
@@ -396,382 +867,945 @@ def markdown_to_docx(md_text: str, docx_path: pathlib.Path) -> None:
     document.save(str(docx_path))
     print(f"[INFO] Wrote DOCX to {docx_path}")
 
-def build_entries() -> List[Dict[str, Any]]:
-    json_files = gather_files(JSON_GLOB, suffix=".json")
-    mc_files = gather_files(MOBILECONFIG_GLOB, suffix=".mobileconfig")
-    entries: List[Dict[str, Any]] = []
-    # Helper: try to load manifest XML next to source file (same base name)
-    def load_manifest_metadata(source_path: pathlib.Path) -> Dict[str, str]:
-        meta: Dict[str, str] = {}
-        manifest_path = source_path.with_suffix('.xml')
-        if manifest_path.exists():
-            try:
-                tree = ET.parse(manifest_path)
-                root = tree.getroot()
-                name_el = root.find('Name')
-                desc_el = root.find('Description')
-                type_el = root.find('Type')
-                if name_el is not None and name_el.text:
-                    meta['name'] = name_el.text.strip()
-                if desc_el is not None and desc_el.text:
-                    meta['description'] = desc_el.text.strip()
-                if type_el is not None and type_el.text:
-                    meta['type'] = type_el.text.strip()
-            except Exception as e:
-                print(f"[WARN] Failed to parse manifest XML {manifest_path}: {e}")
-        return meta
-    for f in json_files:
-        doc = safe_read_json(f)
-        if not doc:
-            continue
-        
-        # Determine policy type and extract settings accordingly
-        odata_type = doc.get("@odata.type", "")
-        settings = []
-        
-        # Try Settings Catalog format first
-        settings = extract_settings_catalog(doc)
-        
-        # If no settings found, check for compliance policy
-        if not settings and "CompliancePolicy" in odata_type:
-            settings = extract_compliance_policy(doc)
-        
-        # Fallback for enrollment restriction style JSON
-        if not settings and odata_type.endswith("deviceEnrollmentPlatformRestriction"):
-            pr = doc.get("platformRestriction", {})
-            if isinstance(pr, dict):
-                for k, v in pr.items():
-                    settings.append((f"platformRestriction.{k}", simplify_value(v)))
-        
-        rel = f.relative_to(REPO_ROOT)
-        ref_id = f.stem
-        manifest_meta = load_manifest_metadata(f)
+MANIFEST_FIELDS = ("Name", "Description", "Type", "SourceFile", "Category")
+MANIFEST_SUBTREES = ("Script", "Package", "CustomAttribute")
+
+def extract_json_file(raw: bytes, path: pathlib.Path) -> Dict[str, Any] | None:
+    """Parse a policy JSON document and extract its settings (cacheable result)."""
+    doc = decode_json(raw, path)
+    if not doc:
+        return None
+    type_name = document_type(doc) if isinstance(doc, dict) else ""
+    extractor = resolve_extractor("json", type_name)
+    settings = extractor(doc) if extractor else []
+    return {"type": type_name, "settings": settings}
+
+def extract_mobileconfig_file(raw: bytes, path: pathlib.Path) -> Dict[str, Any] | None:
+    """Parse a mobileconfig plist and extract its payload settings (cacheable result)."""
+    doc = decode_plist(raw, path)
+    if not doc:
+        return None
+    extractor = resolve_extractor("mobileconfig", "")
+    settings = extractor(doc) if extractor else []
+    return {"settings": settings, "display_name": doc.get("PayloadDisplayName")}
+
+def parse_manifest(raw: bytes, path: pathlib.Path) -> Dict[str, Any] | None:
+    """Reduce a manifest XML to its root tag, top-level field texts and subtree settings."""
+    try:
+        root = ET.fromstring(raw)
+    except Exception as e:
+        print(f"[WARN] Failed to parse manifest XML {path}: {e}")
+        return None
+    fields: Dict[str, str | None] = {}
+    for tag in MANIFEST_FIELDS:
+        el = root.find(tag)
+        fields[tag] = el.text if el is not None else None
+    subtrees: Dict[str, List[Tuple[str, str]]] = {}
+    for tag in MANIFEST_SUBTREES:
+        subtree = root.find(tag)
+        if subtree is not None:
+            subtrees[tag] = [(child.tag, child.text.strip()) for child in list(subtree) if child.text]
+    return {"tag": root.tag, "fields": fields, "subtrees": subtrees}
+
+def load_file(
+    path: pathlib.Path,
+    kind: str,
+    extractor: Callable[[bytes, pathlib.Path], Any],
+    cache: ExtractionCache | None = None,
+) -> Any:
+    """Run extractor over one file's bytes, through the cache when given."""
+    try:
+        raw = path.read_bytes()
+    except OSError as e:
+        print(f"[WARN] Failed to read {path}: {e}")
+        return None
+    if cache is None:
+        return extractor(raw, path)
+    return cache.get_or_compute(kind, raw, lambda b: extractor(b, path))
+
+def load_files(
+    files: List[pathlib.Path],
+    kind: str,
+    extractor: Callable[[bytes, pathlib.Path], Any],
+    cache: ExtractionCache | None = None,
+    pool: Executor | None = None,
+) -> List[Any]:
+    """Run extractor over each file's bytes, in order, through the cache and pool when given."""
+    if pool is None:
+        return [load_file(f, kind, extractor, cache) for f in files]
+    return list(pool.map(lambda f: load_file(f, kind, extractor, cache), files))
+
+# Artifact filters: "field=value" with field one of FILTER_FIELDS; a bare value is a path glob.
+# path: fnmatch glob on the source path ('*' crosses '/', a directory matches everything below it)
+# type / category: manifest Type (or the ref-derived type) / manifest Category, case-insensitive
+# ref: reference id prefix such as 'pol', 'scr' or 'pol-sec' (see classify_type)
+FILTER_FIELDS = ("path", "type", "category", "ref")
+WILDCARD_CHARS = set("*?[")
+
+def parse_filter(spec: str) -> Tuple[str, str]:
+    field, sep, value = spec.partition("=")
+    if sep and field.strip().lower() in FILTER_FIELDS:
+        return field.strip().lower(), value.strip()
+    return "path", spec.strip()
+
+def normalize_filter(flt: Tuple[str, str], repo_root: pathlib.Path) -> Tuple[str, str]:
+    """Make a path glob relative to repo_root, like the relpaths it is matched against: '\\'
+    becomes '/', leading './' is dropped and an absolute path inside the repository loses the
+    root prefix. Absolute paths outside it are kept as given and match nothing.
+    """
+    field, pattern = flt
+    if field != "path":
+        return flt
+    pattern = pattern.replace("\\", "/")
+    if pathlib.Path(pattern).is_absolute():
+        for root in dict.fromkeys((repo_root.as_posix(), repo_root.resolve().as_posix())):
+            root = root.rstrip("/")
+            if pattern == root or pattern.startswith(root + "/"):
+                return field, pattern[len(root):].strip("/") or "*"
+        return field, pattern
+    stripped = pattern
+    while stripped.startswith("./"):
+        stripped = stripped[2:].lstrip("/")
+    if stripped == "." or (pattern and not stripped):
+        stripped = "*"
+    return field, stripped
+
+def filter_label(flt: Tuple[str, str]) -> str:
+    field, value = flt
+    return value if field == "path" else f"{field}={value}"
+
+def filter_matches(artifact: Dict[str, Any], field: str, value: str) -> bool:
+    if field == "path":
+        rel = artifact['relpath'].replace("\\", "/")
+        pattern = value.replace("\\", "/").rstrip("/")
+        return fnmatch.fnmatchcase(rel, pattern) or fnmatch.fnmatchcase(rel, pattern + "/*")
+    if field == "ref":
+        return artifact['ref'].lower().startswith(value.lower())
+    return (artifact.get(field) or "").lower() == value.lower()
+
+def passes_filters(artifact: Dict[str, Any], include: List[Tuple[str, str]], exclude: List[Tuple[str, str]]) -> bool:
+    """An artifact passes if it matches any include (or there are none) and no exclude."""
+    if include and not any(filter_matches(artifact, f, v) for f, v in include):
+        return False
+    return not any(filter_matches(artifact, f, v) for f, v in exclude)
+
+def filter_walk_roots(include: List[Tuple[str, str]]) -> List[str] | None:
+    """Directories (relative, posix) that can hold matching artifacts, or None for the whole repo.
+    Only possible when every include is a path glob: each contributes its literal leading
+    directories, since manifests live next to their source files.
+    """
+    if not include or any(field != "path" for field, _ in include):
+        return None
+    roots = []
+    for _, pattern in include:
+        pattern = pattern.replace("\\", "/")
+        if pathlib.PurePosixPath(pattern).is_absolute() or pattern.split("/")[0] == "..":
+            continue  # outside the repository: matches nothing, so adds nothing to walk
+        literal = []
+        for part in pattern.strip("/").split("/"):
+            if WILDCARD_CHARS & set(part):
+                break
+            literal.append(part)
+        if not literal or literal == ["."]:
+            return None
+        roots.append("/".join(literal))
+    return roots
+
+def under_roots(rel: str, roots: List[str] | None) -> bool:
+    return roots is None or any(rel == r or rel.startswith(r + "/") for r in roots)
+
+def index_artifacts(
+    repo_root: pathlib.Path = REPO_ROOT,
+    include: List[Tuple[str, str]] | None = None,
+    exclude: List[Tuple[str, str]] | None = None,
+    cache: ExtractionCache | None = None,
+    pool: Executor | None = None,
+) -> List[Dict[str, Any]]:
+    """Discover artifacts from paths and manifests only, without opening any payload file.
+
+    Returns one descriptor per artifact that passes the filters, in documentation order,
+    carrying everything iter_entries() needs besides the payload settings.
+    """
+    include = [normalize_filter(f, repo_root) for f in include or []]
+    exclude = [normalize_filter(f, repo_root) for f in exclude or []]
+    roots = filter_walk_roots(include)
+
+    def rel_of(p: pathlib.Path) -> str:
+        return p.relative_to(repo_root).as_posix()
+
+    def patterns_for(patterns: List[str]) -> List[str]:
+        # Skip glob patterns whose literal prefix cannot overlap a walk root
+        if roots is None:
+            return patterns
+        kept = []
+        for pattern in patterns:
+            prefix = pattern.split("*", 1)[0].rstrip("/")
+            if any(r.startswith(prefix) or prefix.startswith(r) for r in roots):
+                kept.append(pattern)
+        return kept
+
+    json_files = [f for f in gather_files(patterns_for(JSON_GLOB), suffix=".json", repo_root=repo_root) if under_roots(rel_of(f), roots)]
+    mc_files = [f for f in gather_files(patterns_for(MOBILECONFIG_GLOB), suffix=".mobileconfig", repo_root=repo_root) if under_roots(rel_of(f), roots)]
+    # Manifest pre-index: every XML is either a manifest next to a payload or a standalone manifest
+    if roots is None:
+        xml_manifests = sorted(repo_root.rglob("*.xml"))
+    else:
+        found = set()
+        for r in roots:
+            base = repo_root / r
+            if base.is_dir():
+                found.update(base.rglob("*.xml"))
+            elif base.with_suffix(".xml").is_file():
+                found.add(base.with_suffix(".xml"))
+        xml_manifests = sorted(found)
+    parsed_manifests = dict(zip(xml_manifests, load_files(xml_manifests, "manifest", parse_manifest, cache, pool)))
+
+    artifacts: List[Dict[str, Any]] = []
+    def payload_artifact(f: pathlib.Path, kind: str) -> Dict[str, Any]:
+        parsed = parsed_manifests.get(f.with_suffix('.xml'))
+        fields = parsed["fields"] if parsed else {}
         derived_type = classify_type(f)
-        if 'type' in manifest_meta:
-            derived_type = manifest_meta['type']
-        entries.append({
-            "ref": ref_id,
+        if fields.get("Type"):
+            derived_type = fields["Type"].strip()
+        return {
+            "kind": kind,
+            "path": f,
+            "ref": f.stem,
             "type": derived_type,
-            "relpath": str(rel),
-            "name": manifest_meta.get("name"),
-            "description": manifest_meta.get("description"),
-            "settings": settings,
-            "count": len(settings)
-        })
+            "relpath": str(f.relative_to(repo_root)),
+            "category": (fields.get("Category") or "").strip(),
+            "name": fields["Name"].strip() if fields.get("Name") else None,
+            "description": fields["Description"].strip() if fields.get("Description") else None,
+        }
+    json_artifacts = [payload_artifact(f, "json") for f in json_files]
+    artifacts.extend(json_artifacts)
+    json_relpaths = {a['relpath'] for a in json_artifacts}
 
     # Add standalone manifests for Package, Script, CustomAttribute not covered above
     # We discover all XML manifests and include those whose SourceFile points to a .pkg/.sh/.zsh etc.
-    xml_manifests = list(REPO_ROOT.rglob("*.xml"))
     for mpath in xml_manifests:
-        try:
-            tree = ET.parse(mpath)
-            root = tree.getroot()
-            if root.tag != 'MacIntuneManifest':
-                continue
-            type_el = root.find('Type')
-            src_el = root.find('SourceFile')
-            name_el = root.find('Name')
-            desc_el = root.find('Description')
-            ref_id_el = root.find('ReferenceId')
-            if type_el is None or src_el is None:
-                continue
-            artifact_type = type_el.text.strip()
-            rel_source = src_el.text.strip()
-            
-            # Skip if already processed:
-            # - Policy/CustomConfig/Compliance that point to .json files (handled by JSON processing)
-            # - CustomConfig that points to .mobileconfig (handled by plist processing)
-            # These should ALWAYS be skipped since JSON/mobileconfig processing happens first
-            if artifact_type in {'Policy', 'CustomConfig', 'Compliance'} and rel_source.endswith('.json'):
-                continue
-            if artifact_type == 'CustomConfig' and rel_source.endswith('.mobileconfig'):
-                continue
-            
-            # Additional check: skip if already in entries by relpath
-            rel_path_obj = REPO_ROOT / rel_source
-            already = any(e['relpath'] == rel_source for e in entries)
-            if already:
-                continue
-            # Extract subtree settings for Script, Package, CustomAttribute
-            settings: List[Tuple[str, str]] = []
-            if artifact_type in {"Script", "Package", "CustomAttribute"}:
-                subtree_tag = {
-                    "Script": "Script",
-                    "Package": "Package",
-                    "CustomAttribute": "CustomAttribute"
-                }[artifact_type]
-                subtree = root.find(subtree_tag)
-                if subtree is not None:
-                    for child in list(subtree):
-                        if child.text:
-                            settings.append((child.tag, child.text.strip()))
-            entries.append({
-                "ref": (rel_path_obj.stem if rel_path_obj.exists() else (mpath.stem)),
-                "type": artifact_type,
-                "relpath": rel_source,
-                "name": name_el.text.strip() if name_el is not None and name_el.text else None,
-                "description": desc_el.text.strip() if desc_el is not None and desc_el.text else "",
-                "settings": settings,
-                "count": len(settings),
-            })
-        except Exception as e:
-            print(f"[WARN] Failed processing manifest {mpath}: {e}")
-    for f in mc_files:
-        doc = safe_read_plist(f)
-        if not doc:
+        parsed = parsed_manifests[mpath]
+        if not parsed or parsed["tag"] != 'MacIntuneManifest':
             continue
-        settings = extract_mobileconfig(doc)
-        rel = f.relative_to(REPO_ROOT)
-        ref_id = f.stem
-        manifest_meta = load_manifest_metadata(f)
-        derived_type = classify_type(f)
-        if 'type' in manifest_meta:
-            derived_type = manifest_meta['type']
-        entries.append({
-            "ref": ref_id,
-            "type": derived_type,
-            "relpath": str(rel),
-            "name": manifest_meta.get("name") or doc.get("PayloadDisplayName"),
-            "description": manifest_meta.get("description", ""),
+        fields = parsed["fields"]
+        if not fields["Type"] or not fields["SourceFile"]:
+            continue
+        artifact_type = fields["Type"].strip()
+        rel_source = fields["SourceFile"].strip()
+
+        # Skip if already processed:
+        # - Policy/CustomConfig/Compliance that point to .json files (handled by JSON processing)
+        # - CustomConfig that points to .mobileconfig (handled by plist processing)
+        # These should ALWAYS be skipped since JSON/mobileconfig processing happens first
+        if artifact_type in {'Policy', 'CustomConfig', 'Compliance'} and rel_source.endswith('.json'):
+            continue
+        if artifact_type == 'CustomConfig' and rel_source.endswith('.mobileconfig'):
+            continue
+
+        # Additional check: skip if already covered by a JSON payload
+        if rel_source in json_relpaths:
+            continue
+        rel_path_obj = repo_root / rel_source
+        # Extract subtree settings for Script, Package, CustomAttribute
+        settings: List[Tuple[str, str]] = []
+        if artifact_type in MANIFEST_SUBTREES:
+            settings = [tuple(pair) for pair in parsed["subtrees"].get(artifact_type, [])]
+        artifacts.append({
+            "kind": "manifest",
+            "path": mpath,
+            "ref": (rel_path_obj.stem if rel_path_obj.exists() else (mpath.stem)),
+            "type": artifact_type,
+            "relpath": rel_source,
+            "category": (fields.get("Category") or "").strip(),
+            "name": fields["Name"].strip() if fields["Name"] else None,
+            "description": fields["Description"].strip() if fields["Description"] else "",
             "settings": settings,
-            "count": len(settings)
         })
-    
-    # Deduplicate entries by (ref, type, relpath) tuple
+    artifacts.extend(payload_artifact(f, "mobileconfig") for f in mc_files)
+
+    # Deduplicate by (ref, type, relpath) tuple, then apply filters
     seen = set()
-    deduped = []
-    for entry in entries:
-        key = (entry['ref'], entry['type'], entry['relpath'])
-        if key not in seen:
-            seen.add(key)
-            deduped.append(entry)
-    
-    deduped.sort(key=lambda x: x['ref'])
-    return deduped
+    selected = []
+    unmatched = set(include)
+    for artifact in artifacts:
+        key = (artifact['ref'], artifact['type'], artifact['relpath'])
+        if key in seen:
+            continue
+        seen.add(key)
+        if unmatched:
+            unmatched = {f for f in unmatched if not filter_matches(artifact, *f)}
+        if passes_filters(artifact, include, exclude):
+            selected.append(artifact)
+    for flt in dict.fromkeys(include):
+        if flt in unmatched:
+            print(f"[WARN] --include {filter_label(flt)} matched no artifacts under {repo_root}")
+    selected.sort(key=lambda x: x['ref'])
+    return selected
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate payload documentation (Markdown + optional DOCX)")
-    parser.add_argument("--docx", action="store_true", help="Also generate a DOCX file")
-    parser.add_argument("--pandoc", action="store_true", help="Use pandoc for DOCX conversion (requires pandoc installed)")
-    args = parser.parse_args()
+def load_entry(artifact: Dict[str, Any], cache: ExtractionCache | None = None) -> Dict[str, Any] | None:
+    """Open and extract an indexed artifact's payload; None if the payload can't be parsed."""
+    name = artifact['name']
+    description = artifact['description']
+    if artifact['kind'] == "manifest":
+        settings = artifact['settings']
+    else:
+        extractor = extract_json_file if artifact['kind'] == "json" else extract_mobileconfig_file
+        extracted = load_file(artifact['path'], artifact['kind'], extractor, cache)
+        if not extracted:
+            return None
+        settings = [tuple(pair) for pair in extracted["settings"]]
+        if artifact['kind'] == "mobileconfig":
+            name = name or extracted.get("display_name")
+            description = description or ""
+    return {
+        "ref": artifact['ref'],
+        "type": artifact['type'],
+        "relpath": artifact['relpath'],
+        "name": name,
+        "description": description,
+        "settings": settings,
+        "count": len(settings),
+    }
 
-    entries = build_entries()
-    markdown = generate_markdown(entries)
-    OUTPUT_FILE.write_text(markdown, encoding="utf-8")
-    print(f"[INFO] Wrote markdown to {OUTPUT_FILE}")
-    print(f"[INFO] Documented {len(entries)} payload artifacts")
-    if args.docx:
-        if args.pandoc:
-            # Attempt pandoc conversion
-            import shutil, subprocess, tempfile
-            pandoc_exe = shutil.which("pandoc")
-            if not pandoc_exe:
-                print("[WARN] --pandoc requested but pandoc not found; falling back to internal converter")
-                markdown_to_docx(markdown, DOCX_OUTPUT_FILE)
-            else:
+def iter_entries(
+    repo_root: pathlib.Path = REPO_ROOT,
+    include: List[str] | None = None,
+    exclude: List[str] | None = None,
+    cache: ExtractionCache | None = None,
+    pool: Executor | None = None,
+    prefetch: int = 16,
+) -> Iterator[Dict[str, Any]]:
+    """Yield documentation entries lazily, in ref order, for artifacts passing the filters.
+
+    include/exclude take filter specs (see parse_filter). Filters are applied to the path and
+    manifest index before any payload is opened, and payloads are only read as entries are
+    consumed (up to prefetch ahead when a pool is given), so callers can stop early.
+    """
+    artifacts = index_artifacts(
+        repo_root,
+        [parse_filter(s) for s in include or []],
+        [parse_filter(s) for s in exclude or []],
+        cache,
+        pool,
+    )
+    if pool is None:
+        for artifact in artifacts:
+            entry = load_entry(artifact, cache)
+            if entry:
+                yield entry
+        return
+    pending: Deque[Future] = collections.deque()
+    remaining = iter(artifacts)
+    try:
+        for artifact in itertools.islice(remaining, prefetch):
+            pending.append(pool.submit(load_entry, artifact, cache))
+        while pending:
+            entry = pending.popleft().result()
+            for artifact in itertools.islice(remaining, 1):
+                pending.append(pool.submit(load_entry, artifact, cache))
+            if entry:
+                yield entry
+    finally:
+        for future in pending:
+            future.cancel()
+
+def build_entries(
+    repo_root: pathlib.Path = REPO_ROOT,
+    cache: ExtractionCache | None = None,
+    pool: Executor | None = None,
+    include: List[str] | None = None,
+    exclude: List[str] | None = None,
+) -> List[Dict[str, Any]]:
+    return list(iter_entries(repo_root, include, exclude, cache, pool))
+
+def write_docx(markdown: str, docx_path: pathlib.Path, use_pandoc: bool = False) -> None:
+    """Write DOCX output, via pandoc (with table post-processing) or the internal converter."""
+    if use_pandoc:
+        # Attempt pandoc conversion
+        import shutil, subprocess, tempfile
+        pandoc_exe = shutil.which("pandoc")
+        if not pandoc_exe:
+            print("[WARN] --pandoc requested but pandoc not found; falling back to internal converter")
+            markdown_to_docx(markdown, docx_path)
+        else:
+            try:
+                # Write temp markdown file, run pandoc
+                with tempfile.NamedTemporaryFile(suffix='.md', delete=False) as tmp_md:
+                    tmp_md.write(markdown.encode('utf-8'))
+                    tmp_md_path = tmp_md.name
+                cmd = [pandoc_exe, '-f', 'markdown', tmp_md_path, '-o', str(docx_path), '--standalone']
+                print(f"[INFO] Running pandoc: {' '.join(cmd)}")
+                subprocess.run(cmd, check=True)
+                print(f"[INFO] Wrote DOCX via pandoc to {docx_path}")
+                # Post-process tables for styling
                 try:
-                    # Write temp markdown file, run pandoc
-                    with tempfile.NamedTemporaryFile(suffix='.md', delete=False) as tmp_md:
-                        tmp_md.write(markdown.encode('utf-8'))
-                        tmp_md_path = tmp_md.name
-                    cmd = [pandoc_exe, '-f', 'markdown', tmp_md_path, '-o', str(DOCX_OUTPUT_FILE), '--standalone']
-                    print(f"[INFO] Running pandoc: {' '.join(cmd)}")
-                    subprocess.run(cmd, check=True)
-                    print(f"[INFO] Wrote DOCX via pandoc to {DOCX_OUTPUT_FILE}")
-                    # Post-process tables for styling
-                    try:
-                        from docx import Document
-                        from docx.shared import Pt
+                    from docx import Document
+                    from docx.shared import Pt
+                    from docx.oxml import OxmlElement
+                    from docx.oxml.ns import qn
+                    doc = Document(str(docx_path))
+                    table_count = 0
+                    for tbl_idx, tbl in enumerate(doc.tables):
+                        table_count += 1
+                        # Apply grid style if exists
+                        try:
+                            tbl.style = 'Table Grid'
+                        except Exception:
+                            pass
+                        # First table is summary table - use smaller font (9pt) for all cells
+                        is_summary_table = (tbl_idx == 0)
+                        # Set table to autofit contents
                         from docx.oxml import OxmlElement
                         from docx.oxml.ns import qn
-                        doc = Document(str(DOCX_OUTPUT_FILE))
-                        table_count = 0
-                        for tbl_idx, tbl in enumerate(doc.tables):
-                            table_count += 1
-                            # Apply grid style if exists
-                            try:
-                                tbl.style = 'Table Grid'
-                            except Exception:
-                                pass
-                            # First table is summary table - use smaller font (9pt) for all cells
-                            is_summary_table = (tbl_idx == 0)
-                            # Set table to autofit contents
-                            from docx.oxml import OxmlElement
-                            from docx.oxml.ns import qn
-                            tbl_element = tbl._tbl
-                            tblPr = tbl_element.tblPr
-                            if tblPr is None:
-                                tblPr = OxmlElement('w:tblPr')
-                                tbl_element.insert(0, tblPr)
-                            
-                            # Remove any existing table width setting
-                            for e in list(tblPr):
-                                if e.tag == qn('w:tblW'):
-                                    tblPr.remove(e)
-                            
-                            # Set table width to AUTO (0) to enable autofit to contents
-                            tblW = OxmlElement('w:tblW')
-                            tblW.set(qn('w:w'), '0')
-                            tblW.set(qn('w:type'), 'auto')
-                            tblPr.append(tblW)
-                            
-                            # Set autofit layout
-                            for e in list(tblPr):
-                                if e.tag == qn('w:tblLayout'):
-                                    tblPr.remove(e)
-                            layout = OxmlElement('w:tblLayout')
-                            layout.set(qn('w:type'), 'autofit')
-                            tblPr.append(layout)
-                            
-                            # Remove fixed width constraints on all columns to allow autofit
-                            tblGrid = tbl_element.find(qn('w:tblGrid'))
-                            if tblGrid is not None:
-                                for gridCol in tblGrid.findall(qn('w:gridCol')):
-                                    # Remove w:w attribute (fixed width)
-                                    if qn('w:w') in gridCol.attrib:
-                                        del gridCol.attrib[qn('w:w')]
-                            
-                            # Remove cell width constraints
-                            for row in tbl._element.findall(qn('w:tr')):
-                                for tc in row.findall(qn('w:tc')):
-                                    tcPr = tc.find(qn('w:tcPr'))
-                                    if tcPr is not None:
-                                        tcW = tcPr.find(qn('w:tcW'))
-                                        if tcW is not None:
-                                            tcPr.remove(tcW)
-                            # Enforce borders (grid) even if style not applied
-                            from docx.oxml import OxmlElement
-                            from docx.oxml.ns import qn
-                            # Access or create tblPr for borders
-                            tbl_element = tbl._tbl
-                            tblPr = tbl_element.tblPr
-                            if tblPr is None:
-                                tblPr = OxmlElement('w:tblPr')
-                                tbl_element.insert(0, tblPr)
-                            # Remove existing borders then set new
-                            for e in list(tblPr):
-                                if e.tag == qn('w:tblBorders'):
-                                    tblPr.remove(e)
-                            borders = OxmlElement('w:tblBorders')
-                            for side in ['top','left','bottom','right','insideH','insideV']:
-                                elem = OxmlElement(f'w:{side}')
-                                elem.set(qn('w:val'), 'single')
-                                elem.set(qn('w:sz'), '6')  # ~0.5pt
-                                elem.set(qn('w:space'), '0')
-                                elem.set(qn('w:color'), '000000')
-                                borders.append(elem)
-                            tblPr.append(borders)
-                            if tbl.rows:
-                                # Header row shading & bold
-                                hdr = tbl.rows[0]
-                                for ci, cell in enumerate(hdr.cells):
-                                    for p in cell.paragraphs:
-                                        for run in p.runs:
-                                            run.font.bold = True
-                                            run.font.name = 'Courier New'
-                                            run.font.size = Pt(8)
-                                    tc = cell._tc
-                                    tcPr = tc.get_or_add_tcPr()
-                                    shd = OxmlElement('w:shd')
-                                    shd.set(qn('w:val'), 'clear')
-                                    shd.set(qn('w:color'), 'auto')
-                                    shd.set(qn('w:fill'), 'D9D9D9')
-                                    tcPr.append(shd)
-                            # Data rows formatting
-                            for r_index, row in enumerate(tbl.rows[1:], start=1):
-                                for ci, cell in enumerate(row.cells):
-                                    for p in cell.paragraphs:
-                                        # Also check for hyperlinks which have separate styling
-                                        for hyperlink in p._element.findall('.//' + qn('w:hyperlink')):
-                                            for run_elem in hyperlink.findall('.//' + qn('w:r')):
-                                                rPr = run_elem.find(qn('w:rPr'))
-                                                if rPr is None:
-                                                    rPr = OxmlElement('w:rPr')
-                                                    run_elem.insert(0, rPr)
-                                                # Remove existing font size
-                                                for sz in list(rPr.findall(qn('w:sz'))):
-                                                    rPr.remove(sz)
-                                                for szCs in list(rPr.findall(qn('w:szCs'))):
-                                                    rPr.remove(szCs)
-                                                # Set new font size
-                                                if is_summary_table:
-                                                    sz = OxmlElement('w:sz')
-                                                    sz.set(qn('w:val'), '16')  # 8pt = 16 half-points
-                                                    rPr.append(sz)
-                                                    szCs = OxmlElement('w:szCs')
-                                                    szCs.set(qn('w:val'), '16')
-                                                    rPr.append(szCs)
-                                        
-                                        for run in p.runs:
-                                            # All table text uses Courier New 8pt
-                                            run.font.name = 'Courier New'
-                                            run.font.size = Pt(8)
-                                            # Value column (second column, ci==1) should be bold
-                                            if ci == 1:
-                                                run.font.bold = True
+                        tbl_element = tbl._tbl
+                        tblPr = tbl_element.tblPr
+                        if tblPr is None:
+                            tblPr = OxmlElement('w:tblPr')
+                            tbl_element.insert(0, tblPr)
                         
-                        # Set paragraph and heading fonts to Aptos
-                        # Find first 3 headings (cover page sections) and make them large/bold
-                        h1_count = 0
-                        for para in doc.paragraphs:
-                            # Count H1 headings to track pages (0=cover, 1=description, 2=index, 3+=details)
-                            if para.style.name == 'Heading 1':
-                                h1_count += 1
-                            
-                            is_cover_page = (h1_count == 1)  # First H1 is cover page
-                            
-                            for run in para.runs:
-                                run.font.name = 'Aptos'
-                                run.font.size = Pt(11)
-                                # Make cover page text bold
-                                if is_cover_page:
-                                    run.font.bold = True
-                            
-                            # Headings get larger font
-                            if para.style.name.startswith('Heading'):
-                                para.paragraph_format.space_after = Pt(8)
-                                para.paragraph_format.space_before = Pt(12)
-                                for run in para.runs:
-                                    if para.style.name == 'Heading 1':
-                                        # Cover page gets huge fonts
-                                        run.font.size = Pt(36 if is_cover_page else 16)
-                                    elif para.style.name == 'Heading 2':
-                                        run.font.size = Pt(24 if is_cover_page else 14)
-                                    else:
-                                        run.font.size = Pt(14)
+                        # Remove any existing table width setting
+                        for e in list(tblPr):
+                            if e.tag == qn('w:tblW'):
+                                tblPr.remove(e)
                         
-                        # Set document to modern Word format (removes compatibility mode)
-                        # Create new compat settings for Word 2016+
-                        settings_element = doc.settings.element
+                        # Set table width to AUTO (0) to enable autofit to contents
+                        tblW = OxmlElement('w:tblW')
+                        tblW.set(qn('w:w'), '0')
+                        tblW.set(qn('w:type'), 'auto')
+                        tblPr.append(tblW)
                         
-                        # Remove old compatibility settings
-                        for compat in list(settings_element.findall(qn('w:compat'))):
-                            settings_element.remove(compat)
+                        # Set autofit layout
+                        for e in list(tblPr):
+                            if e.tag == qn('w:tblLayout'):
+                                tblPr.remove(e)
+                        layout = OxmlElement('w:tblLayout')
+                        layout.set(qn('w:type'), 'autofit')
+                        tblPr.append(layout)
                         
-                        # Add modern compatibility mode settings
-                        compat = OxmlElement('w:compat')
-                        # Set compatibilityMode to 15 (Word 2013+) or 16 (Word 2016+)
-                        compat_setting = OxmlElement('w:compatSetting')
-                        compat_setting.set(qn('w:name'), 'compatibilityMode')
-                        compat_setting.set(qn('w:uri'), 'http://schemas.microsoft.com/office/word')
-                        compat_setting.set(qn('w:val'), '16')  # Word 2016+ format
-                        compat.append(compat_setting)
-                        settings_element.append(compat)
+                        # Remove fixed width constraints on all columns to allow autofit
+                        tblGrid = tbl_element.find(qn('w:tblGrid'))
+                        if tblGrid is not None:
+                            for gridCol in tblGrid.findall(qn('w:gridCol')):
+                                # Remove w:w attribute (fixed width)
+                                if qn('w:w') in gridCol.attrib:
+                                    del gridCol.attrib[qn('w:w')]
                         
-                        doc.save(str(DOCX_OUTPUT_FILE))
-                        print(f"[INFO] Post-processed {table_count} tables in pandoc DOCX (autofit=on by default)")
-                    except Exception as e:
-                        print(f"[WARN] DOCX post-processing failed: {e}")
-                except subprocess.CalledProcessError as e:
-                    print(f"[WARN] pandoc failed ({e}); falling back to internal converter")
-                    markdown_to_docx(markdown, DOCX_OUTPUT_FILE)
-                finally:
-                    try:
-                        pathlib.Path(tmp_md_path).unlink(missing_ok=True)
-                    except Exception:
-                        pass
+                        # Remove cell width constraints
+                        for row in tbl._element.findall(qn('w:tr')):
+                            for tc in row.findall(qn('w:tc')):
+                                tcPr = tc.find(qn('w:tcPr'))
+                                if tcPr is not None:
+                                    tcW = tcPr.find(qn('w:tcW'))
+                                    if tcW is not None:
+                                        tcPr.remove(tcW)
+                        # Enforce borders (grid) even if style not applied
+                        from docx.oxml import OxmlElement
+                        from docx.oxml.ns import qn
+                        # Access or create tblPr for borders
+                        tbl_element = tbl._tbl
+                        tblPr = tbl_element.tblPr
+                        if tblPr is None:
+                            tblPr = OxmlElement('w:tblPr')
+                            tbl_element.insert(0, tblPr)
+                        # Remove existing borders then set new
+                        for e in list(tblPr):
+                            if e.tag == qn('w:tblBorders'):
+                                tblPr.remove(e)
+                        borders = OxmlElement('w:tblBorders')
+                        for side in ['top','left','bottom','right','insideH','insideV']:
+                            elem = OxmlElement(f'w:{side}')
+                            elem.set(qn('w:val'), 'single')
+                            elem.set(qn('w:sz'), '6')  # ~0.5pt
+                            elem.set(qn('w:space'), '0')
+                            elem.set(qn('w:color'), '000000')
+                            borders.append(elem)
+                        tblPr.append(borders)
+                        if tbl.rows:
+                            # Header row shading & bold
+                            hdr = tbl.rows[0]
+                            for ci, cell in enumerate(hdr.cells):
+                                for p in cell.paragraphs:
+                                    for run in p.runs:
+                                        run.font.bold = True
+                                        run.font.name = 'Courier New'
+                                        run.font.size = Pt(8)
+                                tc = cell._tc
+                                tcPr = tc.get_or_add_tcPr()
+                                shd = OxmlElement('w:shd')
+                                shd.set(qn('w:val'), 'clear')
+                                shd.set(qn('w:color'), 'auto')
+                                shd.set(qn('w:fill'), 'D9D9D9')
+                                tcPr.append(shd)
+                        # Data rows formatting
+                        for r_index, row in enumerate(tbl.rows[1:], start=1):
+                            for ci, cell in enumerate(row.cells):
+                                for p in cell.paragraphs:
+                                    # Also check for hyperlinks which have separate styling
+                                    for hyperlink in p._element.findall('.//' + qn('w:hyperlink')):
+                                        for run_elem in hyperlink.findall('.//' + qn('w:r')):
+                                            rPr = run_elem.find(qn('w:rPr'))
+                                            if rPr is None:
+                                                rPr = OxmlElement('w:rPr')
+                                                run_elem.insert(0, rPr)
+                                            # Remove existing font size
+                                            for sz in list(rPr.findall(qn('w:sz'))):
+                                                rPr.remove(sz)
+                                            for szCs in list(rPr.findall(qn('w:szCs'))):
+                                                rPr.remove(szCs)
+                                            # Set new font size
+                                            if is_summary_table:
+                                                sz = OxmlElement('w:sz')
+                                                sz.set(qn('w:val'), '16')  # 8pt = 16 half-points
+                                                rPr.append(sz)
+                                                szCs = OxmlElement('w:szCs')
+                                                szCs.set(qn('w:val'), '16')
+                                                rPr.append(szCs)
+                                    
+                                    for run in p.runs:
+                                        # All table text uses Courier New 8pt
+                                        run.font.name = 'Courier New'
+                                        run.font.size = Pt(8)
+                                        # Value column (second column, ci==1) should be bold
+                                        if ci == 1:
+                                            run.font.bold = True
+                    
+                    # Set paragraph and heading fonts to Aptos
+                    # Find first 3 headings (cover page sections) and make them large/bold
+                    h1_count = 0
+                    for para in doc.paragraphs:
+                        # Count H1 headings to track pages (0=cover, 1=description, 2=index, 3+=details)
+                        if para.style.name == 'Heading 1':
+                            h1_count += 1
+                        
+                        is_cover_page = (h1_count == 1)  # First H1 is cover page
+                        
+                        for run in para.runs:
+                            run.font.name = 'Aptos'
+                            run.font.size = Pt(11)
+                            # Make cover page text bold
+                            if is_cover_page:
+                                run.font.bold = True
+                        
+                        # Headings get larger font
+                        if para.style.name.startswith('Heading'):
+                            para.paragraph_format.space_after = Pt(8)
+                            para.paragraph_format.space_before = Pt(12)
+                            for run in para.runs:
+                                if para.style.name == 'Heading 1':
+                                    # Cover page gets huge fonts
+                                    run.font.size = Pt(36 if is_cover_page else 16)
+                                elif para.style.name == 'Heading 2':
+                                    run.font.size = Pt(24 if is_cover_page else 14)
+                                else:
+                                    run.font.size = Pt(14)
+                    
+                    # Set document to modern Word format (removes compatibility mode)
+                    # Create new compat settings for Word 2016+
+                    settings_element = doc.settings.element
+                    
+                    # Remove old compatibility settings
+                    for compat in list(settings_element.findall(qn('w:compat'))):
+                        settings_element.remove(compat)
+                    
+                    # Add modern compatibility mode settings
+                    compat = OxmlElement('w:compat')
+                    # Set compatibilityMode to 15 (Word 2013+) or 16 (Word 2016+)
+                    compat_setting = OxmlElement('w:compatSetting')
+                    compat_setting.set(qn('w:name'), 'compatibilityMode')
+                    compat_setting.set(qn('w:uri'), 'http://schemas.microsoft.com/office/word')
+                    compat_setting.set(qn('w:val'), '16')  # Word 2016+ format
+                    compat.append(compat_setting)
+                    settings_element.append(compat)
+                    
+                    doc.save(str(docx_path))
+                    print(f"[INFO] Post-processed {table_count} tables in pandoc DOCX (autofit=on by default)")
+                except Exception as e:
+                    print(f"[WARN] DOCX post-processing failed: {e}")
+            except subprocess.CalledProcessError as e:
+                print(f"[WARN] pandoc failed ({e}); falling back to internal converter")
+                markdown_to_docx(markdown, docx_path)
+            finally:
+                try:
+                    pathlib.Path(tmp_md_path).unlink(missing_ok=True)
+                except Exception:
+                    pass
+    else:
+        markdown_to_docx(markdown, docx_path)
+
+# Near-duplicate detection: settings are reduced to a canonical form, then to an exact
+# fingerprint and a MinHash signature; LSH banding over the signatures yields candidate
+# pairs, which are scored by exact Jaccard similarity. Split settings (a small artifact
+# largely contained in a much larger one) are found separately with a prefix-filtered
+# inverted index and scored by overlap with the smaller artifact.
+VOLATILE_KEY_RE = re.compile(r"^(id|uuid|guid|payloaduuid|payloadidentifier|version)$|(datetime|timestamp)$")
+GUID_RE = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+TIMESTAMP_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?\b")
+# Settings Catalog ids for user-scoped preferences: com.apple.screensaver.user_idleTime
+USER_DOMAIN_RE = re.compile(r"\.user(?=_)")
+MINHASH_PRIME = (1 << 61) - 1
+# A subset pair needs the larger artifact to have at least this many times the settings
+SUBSET_SIZE_RATIO = 2
+
+@functools.lru_cache(maxsize=None)
+def canonical_key(key: str) -> str | None:
+    """Lowercase a setting key and fold '_' into '.', so Settings Catalog ids and
+    mobileconfig PayloadType.Key names for the same preference compare equal. The user
+    scope of a Settings Catalog domain is dropped as well, since a mobileconfig payload
+    names only the domain. Returns None for id/version/timestamp keys.
+    """
+    norm_key = USER_DOMAIN_RE.sub("", key, count=1).lower().replace("_", ".")
+    leaf = re.sub(r"\[\d+\]$", "", norm_key).rsplit(".", 1)[-1]
+    if VOLATILE_KEY_RE.search(leaf):
+        return None
+    return norm_key
+
+def canonical_settings(settings: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Return settings with ids/timestamps stripped and keys normalized and sorted."""
+    out = set()
+    for key, value in settings:
+        norm_key = canonical_key(key)
+        if norm_key is None:
+            continue
+        value = str(value)
+        if "-" in value:  # both GUIDs and ISO timestamps contain '-'
+            value = TIMESTAMP_RE.sub("<timestamp>", GUID_RE.sub("<guid>", value))
+        out.add((norm_key, value))
+    return sorted(out)
+
+def settings_fingerprint(canonical: List[Tuple[str, str]]) -> str:
+    return hashlib.sha1(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def settings_shingles(canonical: List[Tuple[str, str]]) -> set:
+    """One key=value shingle per setting. Two artifacts with the same n keys where d values
+    differ score (n - d) / (n + d): reported at the default 0.5 threshold while at most a
+    third of the values differ. Keys alone are not shingled; variants of one policy would
+    all score at least 1/3 and flood the LSH buckets.
+    """
+    return {f"{key}={value}" for key, value in canonical}
+
+class MinHasher:
+    """MinHash signatures over string shingles using num_perm universal hash functions.
+
+    Per-shingle hash vectors are memoized; policies share most of their settings, so a
+    signature is usually an element-wise min over vectors that are already computed.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, MINHASH_PRIME), rng.randrange(0, MINHASH_PRIME)) for _ in range(num_perm)]
+        self._vectors: Dict[str, Tuple[int, ...]] = {}
+
+    def _vector(self, shingle: str) -> Tuple[int, ...]:
+        vector = self._vectors.get(shingle)
+        if vector is None:
+            x = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            vector = tuple([(a * x + b) % MINHASH_PRIME for a, b in self._params])
+            self._vectors[shingle] = vector
+        return vector
+
+    def signature(self, shingles: set) -> Tuple[int, ...]:
+        return tuple(map(min, zip(*[self._vector(s) for s in shingles])))
+
+@functools.lru_cache(maxsize=None)
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows per band), bands * rows <= num_perm, whose candidate probability
+    1 - (1 - s^rows)^bands best separates similarity s at threshold: the sum of the
+    false-positive area below threshold and the false-negative area above it is minimal.
+    """
+    steps = 100
+
+    def area(bands: int, rows: int, low: float, high: float, missed: bool) -> float:
+        width = (high - low) / steps
+        total = 0.0
+        for i in range(steps):
+            p = 1 - (1 - (low + (i + 0.5) * width) ** rows) ** bands
+            total += (1 - p if missed else p) * width
+        return total
+
+    best = (math.inf, num_perm, 1)
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            error = area(bands, rows, 0.0, threshold, False) + area(bands, rows, threshold, 1.0, True)
+            if error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+def subset_pairs(shingles_by_fp: Dict[str, set], threshold: float) -> List[Tuple[float, str, str]]:
+    """Return (overlap, smaller fp, larger fp) where at least threshold of the smaller set
+    is in a set at least SUBSET_SIZE_RATIO times its size.
+
+    Prefix filtering: such a pair must share one of the smaller set's
+    len - ceil(threshold * len) + 1 rarest shingles, so only those are looked up, and
+    postings are sorted by set size so only large enough sets are visited. Variants of
+    one policy have similar sizes and are never compared here.
+    """
+    frequency = collections.Counter(sh for shingles in shingles_by_fp.values() for sh in shingles)
+    postings: Dict[str, List[Tuple[int, str]]] = {}
+    for fp, shingles in shingles_by_fp.items():
+        for sh in shingles:
+            postings.setdefault(sh, []).append((len(shingles), fp))
+    for posting in postings.values():
+        posting.sort()
+    pairs: List[Tuple[float, str, str]] = []
+    for fp, shingles in shingles_by_fp.items():
+        size = len(shingles)
+        needed = max(1, math.ceil(threshold * size))
+        prefix = sorted(shingles, key=lambda sh: (frequency[sh], sh))[:size - needed + 1]
+        candidates = set()
+        for sh in prefix:
+            posting = postings[sh]
+            start = bisect.bisect_left(posting, (size * SUBSET_SIZE_RATIO, ""))
+            candidates.update(other for _, other in posting[start:])
+        for other in candidates:
+            overlap = len(shingles & shingles_by_fp[other]) / size
+            if overlap >= threshold:
+                pairs.append((overlap, fp, other))
+    return pairs
+
+def find_similar(
+    entries: List[Dict[str, Any]],
+    threshold: float = 0.5,
+    num_perm: int = 64,
+    bands: int | None = None,
+) -> Dict[str, Any]:
+    """Report identical and near-identical artifacts by their extracted payload settings.
+
+    Returns {"identical": [[ref, ...], ...], "similar": [(score, ref_a, ref_b), ...],
+    "subsets": [(overlap, smaller_ref, larger_ref), ...]}. similar is scored by Jaccard
+    similarity; subsets reports artifacts whose settings are largely repeated in one at
+    least SUBSET_SIZE_RATIO times larger (settings split across artifacts), scored by the
+    share of the smaller artifact's settings found in the larger one.
+    Identical groups are collapsed to one representative before LSH, and only pairs that
+    share a band bucket are scored, so the cost grows with the number of candidates rather
+    than with every pair of artifacts. Scripts, packages and custom attributes are skipped:
+    their settings are manifest options, not payload.
+    """
+    if bands:
+        rows_per_band = num_perm // bands
+    else:
+        bands, rows_per_band = lsh_bands(num_perm, threshold)
+    groups: Dict[str, List[str]] = {}
+    shingles_by_fp: Dict[str, set] = {}
+    for e in entries:
+        if e['type'] in MANIFEST_SUBTREES:
+            continue
+        canonical = canonical_settings(e['settings'])
+        if not canonical:
+            continue
+        fp = settings_fingerprint(canonical)
+        groups.setdefault(fp, []).append(e['ref'])
+        if fp not in shingles_by_fp:
+            shingles_by_fp[fp] = settings_shingles(canonical)
+
+    hasher = MinHasher(num_perm)
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+    for fp, shingles in shingles_by_fp.items():
+        sig = hasher.signature(shingles)
+        for band in range(bands):
+            start = band * rows_per_band
+            buckets.setdefault((band, sig[start:start + rows_per_band]), []).append(fp)
+
+    candidates = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                candidates.add((min(members[i], members[j]), max(members[i], members[j])))
+
+    similar: List[Tuple[float, str, str]] = []
+    for fp_a, fp_b in candidates:
+        a, b = shingles_by_fp[fp_a], shingles_by_fp[fp_b]
+        score = len(a & b) / len(a | b)
+        if score >= threshold:
+            for ref_a in groups[fp_a]:
+                for ref_b in groups[fp_b]:
+                    similar.append((score, *sorted((ref_a, ref_b))))
+    similar.sort(key=lambda item: (-item[0], item[1], item[2]))
+
+    subsets: List[Tuple[float, str, str]] = []
+    for overlap, fp_small, fp_large in subset_pairs(shingles_by_fp, threshold):
+        for ref_small in groups[fp_small]:
+            for ref_large in groups[fp_large]:
+                subsets.append((overlap, ref_small, ref_large))
+    subsets.sort(key=lambda item: (-item[0], item[1], item[2]))
+    identical = sorted(sorted(refs) for refs in groups.values() if len(refs) > 1)
+    return {"identical": identical, "similar": similar, "subsets": subsets, "artifacts": sum(len(r) for r in groups.values())}
+
+def print_similarity_report(report: Dict[str, Any], threshold: float) -> None:
+    print(f"[INFO] Compared {report['artifacts']} artifacts with settings")
+    print(f"[INFO] Identical setting sets: {len(report['identical'])} group(s)")
+    for refs in report['identical']:
+        print(f"  {', '.join(refs)}")
+    print(f"[INFO] Near-identical pairs (similarity >= {threshold:.2f}): {len(report['similar'])}")
+    for score, ref_a, ref_b in report['similar']:
+        print(f"  {score:.2f}  {ref_a}  {ref_b}")
+    print(f"[INFO] Split settings (>= {threshold:.2f} of an artifact's settings repeated in a larger one): {len(report['subsets'])}")
+    for overlap, ref_small, ref_large in report['subsets']:
+        print(f"  {overlap:.2f}  {ref_small}  in  {ref_large}")
+
+def generate_documentation(
+    repo_root: pathlib.Path = REPO_ROOT,
+    output_dir: pathlib.Path | None = None,
+    docx: bool = False,
+    use_pandoc: bool = False,
+    cache: ExtractionCache | None = None,
+    pool: Executor | None = None,
+    templates: Dict[str, CompiledTemplate] | None = None,
+    include: List[str] | None = None,
+    exclude: List[str] | None = None,
+) -> Dict[str, Any]:
+    """Run the full pipeline for one repository root and return a small run summary.
+
+    Outputs land in output_dir (defaults to repo_root). Pass a shared cache, pool and
+    compiled templates when documenting several roots in one process. include/exclude
+    restrict the run to matching artifacts (see parse_filter).
+    """
+    repo_root = pathlib.Path(repo_root).resolve()
+    output_dir = pathlib.Path(output_dir) if output_dir else repo_root
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / OUTPUT_NAME
+    docx_output_file = output_dir / DOCX_OUTPUT_NAME
+    started = time.perf_counter()
+    hits_before = cache.hits if cache else 0
+    entries = build_entries(repo_root, cache=cache, pool=pool, include=include, exclude=exclude)
+    markdown = generate_markdown(entries, templates)
+    output_file.write_text(markdown, encoding="utf-8")
+    print(f"[INFO] Wrote markdown to {output_file}")
+    print(f"[INFO] Documented {len(entries)} payload artifacts")
+    if docx:
+        write_docx(markdown, docx_output_file, use_pandoc)
+    return {
+        "root": repo_root,
+        "output": output_file,
+        "artifacts": len(entries),
+        "cache_hits": (cache.hits - hits_before) if cache else 0,
+        "seconds": time.perf_counter() - started,
+    }
+
+def print_batch_summary(summaries: List[Dict[str, Any]]) -> None:
+    print("")
+    print(f"{'Tenant root':<50} {'Artifacts':>9} {'Cache hits':>10} {'Seconds':>8}")
+    for s in summaries:
+        print(f"{str(s['root']):<50} {s['artifacts']:>9} {s['cache_hits']:>10} {s['seconds']:>8.2f}")
+    total = sum(s['seconds'] for s in summaries)
+    print(f"[INFO] Batch documented {len(summaries)} roots in {total:.2f}s")
+
+def synthetic_settings_catalog(count: int) -> bytes:
+    """Build a BOM-prefixed Settings Catalog export with count choice settings, shaped like the repo's policies."""
+    doc = {
+        "@odata.context": "https://graph.microsoft.com/beta/$metadata#deviceManagement/configurationPolicies/$entity",
+        "name": f"Synthetic {count}",
+        "platforms": "macOS",
+        "settings": [
+            {
+                "id": str(i),
+                "settingInstance": {
+                    "@odata.type": "#microsoft.graph.deviceManagementConfigurationChoiceSettingInstance",
+                    "settingDefinitionId": f"com.apple.synthetic_setting{i}",
+                    "choiceSettingValue": {"value": f"com.apple.synthetic_setting{i}_true", "children": []},
+                },
+            }
+            for i in range(count)
+        ],
+    }
+    return codecs.BOM_UTF8 + json.dumps(doc, indent=4).encode("utf-8")
+
+def benchmark_parsers(repo_root: pathlib.Path = REPO_ROOT, repeat: int = 5) -> None:
+    """Time each available JSON backend (and plistlib) on the repo's payloads and synthetic large policies."""
+    mc_docs = [p.read_bytes() for p in gather_files(MOBILECONFIG_GLOB, suffix=".mobileconfig", repo_root=repo_root)]
+    corpora = {
+        "repo JSON policies": [p.read_bytes() for p in gather_files(JSON_GLOB, suffix=".json", repo_root=repo_root)],
+        "synthetic 10k settings": [synthetic_settings_catalog(10_000)],
+        "synthetic 100k settings": [synthetic_settings_catalog(100_000)],
+        # Inputs where orjson alone would differ from the stdlib; checked for parity too
+        "edge cases": [
+            b'{"a": 123456789012345678901234567890, "b": -9223372036854775809}',
+            b'{"a": 18446744073709551615, "b": 1e400, "c": -0}',
+            codecs.BOM_UTF8 + b'{"a": "\\u00e9", "a": 1}',
+        ],
+    }
+    backends = ["stdlib"] + (["orjson"] if orjson is not None else [])
+
+    def best_of(fn: Callable[[], Any]) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    print(f"{'Corpus':<26} {'Backend':<9} {'MB':>7} {'ms':>9} {'MB/s':>8}")
+    for name, docs in corpora.items():
+        mb = sum(len(d) for d in docs) / 1e6
+        reference = [parse_json_bytes(d, "stdlib") for d in docs]
+        for backend in backends:
+            if [parse_json_bytes(d, backend) for d in docs] != reference:
+                print(f"[WARN] {backend} results differ from stdlib on {name}")
+            seconds = best_of(lambda: [parse_json_bytes(d, backend) for d in docs])
+            print(f"{name:<26} {backend:<9} {mb:>7.2f} {seconds * 1000:>9.2f} {mb / seconds if seconds else 0:>8.1f}")
+    if mc_docs:
+        mb = sum(len(d) for d in mc_docs) / 1e6
+        seconds = best_of(lambda: [plistlib.loads(d) for d in mc_docs])
+        print(f"{'repo mobileconfig':<26} {'plistlib':<9} {mb:>7.2f} {seconds * 1000:>9.2f} {mb / seconds if seconds else 0:>8.1f}")
+    if orjson is None:
+        print("[INFO] orjson not installed; only the stdlib backend was measured (pip install orjson)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate payload documentation (Markdown + optional DOCX)")
+    parser.add_argument("--docx", action="store_true", help="Also generate a DOCX file")
+    parser.add_argument("--pandoc", action="store_true", help="Use pandoc for DOCX conversion (requires pandoc installed)")
+    parser.add_argument("--root", type=pathlib.Path, help="Repository root to document (default: this repo)")
+    parser.add_argument("--output-dir", type=pathlib.Path, help="Directory for generated files (default: the repository root)")
+    parser.add_argument("--batch", nargs=2, action="append", metavar=("ROOT", "OUTPUT_DIR"),
+                        help="Document several repository roots in one process; repeat once per tenant")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads shared by all roots (default: Python's choice)")
+    parser.add_argument("--cache-file", type=pathlib.Path, help="Persist the extraction cache to this JSON file between runs")
+    parser.add_argument("--include", action="append", metavar="FILTER",
+                        help="Only document matching artifacts: a path glob, or type=, category=, ref= or path= (repeatable; any may match)")
+    parser.add_argument("--exclude", action="append", metavar="FILTER", help="Skip matching artifacts; same syntax as --include (repeatable)")
+    parser.add_argument("--templates", type=pathlib.Path, help="Directory of output templates (document.md, artifact.md, ...) overriding the built-ins")
+    parser.add_argument("--dump-templates", type=pathlib.Path, metavar="DIR", help="Write the built-in templates to DIR and exit")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="auto", help="JSON parser backend (default: orjson when installed)")
+    parser.add_argument("--find-similar", action="store_true", help="Report identical and near-identical artifacts (by settings) for --root and exit")
+    parser.add_argument("--similarity-threshold", type=float, default=0.5, help="Minimum Jaccard similarity (and subset overlap) reported by --find-similar (default: 0.5)")
+    parser.add_argument("--benchmark-parsers", action="store_true", help="Time the JSON/plist parser backends and exit")
+    args = parser.parse_args()
+    if args.batch and (args.root or args.output_dir):
+        parser.error("--batch takes its roots and output directories itself; drop --root/--output-dir")
+    args.root = args.root or REPO_ROOT
+
+    global JSON_BACKEND
+    JSON_BACKEND = args.json_backend
+    if JSON_BACKEND == "orjson" and orjson is None:
+        print("[WARN] --json-backend orjson requested but orjson not installed; falling back to stdlib json")
+        JSON_BACKEND = "stdlib"
+    if args.benchmark_parsers:
+        benchmark_parsers(args.root)
+        return
+    if args.dump_templates:
+        dump_templates(args.dump_templates)
+        return
+
+    cache = ExtractionCache(args.cache_file)
+    if args.find_similar:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            entries = build_entries(pathlib.Path(args.root).resolve(), cache=cache, pool=pool, include=args.include, exclude=args.exclude)
+        print_similarity_report(find_similar(entries, args.similarity_threshold), args.similarity_threshold)
+        cache.save()
+        return
+    templates = load_templates(args.templates, cache)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        if args.batch:
+            summaries = [
+                generate_documentation(pathlib.Path(root), pathlib.Path(out), args.docx, args.pandoc, cache, pool, templates,
+                                       args.include, args.exclude)
+                for root, out in args.batch
+            ]
+            print_batch_summary(summaries)
         else:
-            markdown_to_docx(markdown, DOCX_OUTPUT_FILE)
+            generate_documentation(args.root, args.output_dir, args.docx, args.pandoc, cache, pool, templates,
+                                   args.include, args.exclude)
+    cache.save()
 
 if __name__ == "__main__":
     main()